@@ -1,5 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import concurrent.futures
+import functools
+import hashlib
+import queue
+import re
+import threading
+import time
+import types
+from collections.abc import AsyncIterator, Coroutine, Iterator
+from typing import TYPE_CHECKING, Any, TypeVar
+
 import streamlit as st
-from openai import OpenAI
+from streamlit.logger import get_logger
+
+# Streamlit's logger has a handler and follows the logger.level config option, so INFO lines show up
+logger = get_logger(__name__)
+
+if TYPE_CHECKING:
+    # openai (pydantic + many submodules) and httpx are imported lazily where a client is built or used,
+    # so a cold start only pays for them once the user has entered a key
+    import httpx
+    from openai import AsyncOpenAI
 
 # ======================================================================================
 # PAGE CONFIGURATION
@@ -12,8 +36,89 @@ st.set_page_config(page_title="Customer Discovery Simulator", page_icon="🕵️
 PROVIDERS = ("OpenAI", "Gemini", "Gemini (Test)")
 DEFAULT_OPENAI_MODEL = "gpt-5.1"
 DEFAULT_GEMINI_MODEL = "gemini-3-flash-preview"
+# Economy mode runs the persona and interview calls on smaller models; the coach keeps the default model
+ECONOMY_OPENAI_MODEL = "gpt-5-mini"
+ECONOMY_GEMINI_MODEL = "gemini-2.5-flash-lite"
 GEMINI_OPENAI_COMPAT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
 
+# Interview requests send the system prompt plus at most this many recent user/assistant messages.
+# Older messages are dropped WINDOW_DROP_STEP at a time (see window_messages), and further blocks go
+# while the kept messages exceed WINDOW_MAX_CHARS (roughly 6k tokens)
+MAX_MESSAGES_VERBATIM = 16
+WINDOW_DROP_STEP = 8
+WINDOW_MAX_CHARS = 24_000
+
+# Stands in for the dropped turns in a windowed interview payload
+_OMITTED_TURNS_MESSAGE = {"role": "system", "content": "[Earlier parts of the interview are omitted.]"}
+
+# Output caps per call type. Reasoning tokens count towards max_completion_tokens, so these leave
+# headroom above the visible text: a one-sentence persona (PERSONA_CANDIDATES of them for Generate Persona),
+# a 1-4 sentence reply, the structured critique.
+# Interview replies run with little or no reasoning (see INTERVIEW_REASONING_EFFORT), so their cap is the tightest;
+# it is the default of the sidebar slider
+PERSONA_MAX_COMPLETION_TOKENS = 600
+PERSONA_CANDIDATES_MAX_COMPLETION_TOKENS = 1500
+INTERVIEW_MAX_COMPLETION_TOKENS = 180
+COACH_MAX_COMPLETION_TOKENS = 4000
+
+# Personas offered per Generate Persona click (one call returns all of them)
+PERSONA_CANDIDATES = 3
+
+# Cached LLM clients (one per API key + base URL) kept before the least recently used is dropped;
+# a classroom where every student brings a key should not accumulate clients forever.
+# The connection pools behind them are per endpoint (see get_http_client) and outlive evictions
+CLIENT_CACHE_MAX_ENTRIES = 32
+
+# Idle keep-alive connections are kept this long, so a student thinking over the next question
+# does not pay a new TCP + TLS handshake
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 300.0
+
+# Finished coach feedback is reused for an identical interview under the same API key for this long
+COMPLETION_CACHE_TTL_SECONDS = 24 * 60 * 60
+COMPLETION_CACHE_MAX_ENTRIES = 256
+
+# Static per-provider settings; OpenAI uses the SDK's default base URL
+# prompt_cache_key routes interview turns that share the system prompt prefix to the same prompt cache;
+# only OpenAI accepts it (Gemini caches implicitly and rejects unknown parameters)
+PROVIDER_SETTINGS = {
+    "OpenAI": {
+        "base_url": None,
+        "model_name": DEFAULT_OPENAI_MODEL,
+        "economy_model_name": ECONOMY_OPENAI_MODEL,
+        "prompt_cache_key": "mom_test_v1",
+    },
+    "Gemini": {
+        "base_url": GEMINI_OPENAI_COMPAT_BASE_URL,
+        "model_name": DEFAULT_GEMINI_MODEL,
+        "economy_model_name": ECONOMY_GEMINI_MODEL,
+        "prompt_cache_key": None,
+    },
+    "Gemini (Test)": {
+        "base_url": GEMINI_OPENAI_COMPAT_BASE_URL,
+        "model_name": DEFAULT_GEMINI_MODEL,
+        "economy_model_name": ECONOMY_GEMINI_MODEL,
+        "prompt_cache_key": None,
+    },
+}
+
+# Interview replies use the lowest reasoning level each model accepts: a 1-2 sentence in-character reply
+# needs no reasoning, and skipping it is most of the per-turn latency
+INTERVIEW_REASONING_EFFORT = {
+    DEFAULT_OPENAI_MODEL: "none",
+    ECONOMY_OPENAI_MODEL: "minimal",
+    DEFAULT_GEMINI_MODEL: "minimal",
+    ECONOMY_GEMINI_MODEL: "none",
+}
+
+# Persona calls keep "low" on the full models; the economy models get their lowest level, since "low" on
+# Gemini 2.5 is a ~1k-token thinking budget that would use up the persona token caps before any text
+PERSONA_REASONING_EFFORT = {
+    DEFAULT_OPENAI_MODEL: "low",
+    ECONOMY_OPENAI_MODEL: "minimal",
+    DEFAULT_GEMINI_MODEL: "low",
+    ECONOMY_GEMINI_MODEL: "none",
+}
+
 HELP_TEXT = (
     "**How to Use:**\n"
     "1. Define your problem, customer, and hypothesis.\n"
@@ -22,6 +127,68 @@ HELP_TEXT = (
     "4. Click **End & Analyze** to get feedback."
 )
 
+# Page styling and the credits block under the logos, injected as raw HTML in the header
+_CUSTOM_CSS = """
+    <style>
+        /* 1. Force the main container to go to the top */
+        .block-container {
+            padding-top: 2rem !important; /* Default is usually 6rem+ */
+            padding-bottom: 2rem !important;
+        }
+
+        /* 2. Remove the rounded corners from logos */
+        [data-testid="stImage"] img {
+            border-radius: 0px !important;
+        }
+
+        /* 3. (Optional) Hide the top header decoration line if you want a clean look */
+        header[data-testid="stHeader"] {
+            background-color: transparent;
+        }
+        
+        /* 2. Sidebar Content: Force to top */
+        [data-testid="stSidebarContent"] {
+            padding-top: 0rem !important;
+        }
+
+        /* 3. SIDEBAR HEADER FIX: Remove the default top margin from the "Setup" header */
+        [data-testid="stSidebarContent"] h2 {
+            margin-top: -32px !important;
+            padding-top: 0px !important;
+        }
+    </style>
+    """
+
+_CREDITS_HTML = """
+    <div style="margin-top: 0px;">
+        <h6 style="margin-bottom: 0px; padding-bottom: 0px;">Wharton-Photon Startup AI Lab</h6>
+        <p style="font-size: 0.85rem; color: gray; margin-top: 2px;">
+            Created by: Arnab Manna, Hari Ravi, J. Daniel Kim (2026)
+        </p>
+    </div>
+    """
+
+# Streamed calls ask for a final usage chunk so escape_dollars can log output throughput
+_STREAM_OPTIONS = {"include_usage": True}
+
+# Translation table used to escape $ in streamed Markdown (see escape_dollars)
+_DOLLAR_TABLE = str.maketrans({"$": r"\$"})
+
+# Streamed deltas are flushed to the UI in batches that double from START to MAX characters,
+# or early at the end of a sentence/line
+STREAM_BATCH_START_CHARS = 8
+STREAM_BATCH_MAX_CHARS = 64
+_FLUSH_ENDINGS = (".", "!", "?", "\n")
+
+# Chat bubble avatars per message role (read-only; other roles fall back to 💬)
+AVATAR_MAP = types.MappingProxyType({"user": "🧑‍🎓", "assistant": "👤"})
+
+# Strips list markers the model may put in front of a persona candidate line
+_CANDIDATE_PREFIX_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+# Splits the fused persona + opener completion (see build_persona_and_opener_prompt)
+_PERSONA_OPENER_RE = re.compile(r"<PERSONA>(.*?)</PERSONA>\s*<OPENER>(.*?)</OPENER>", re.S)
+
 # ======================================================================================
 # SESSION STATE INITIALIZATION
 # ======================================================================================
@@ -31,12 +198,21 @@ def init_session_state() -> None:
         "messages": [],
         "interview_active": False,
         "generated_persona": "",
+        "persona_candidates": [],
         "analysis_done": False,
         "feedback_text": "",
         "problem_statement": "",
         "customer_segment": "",
         "hypothesis_to_validate": "",
-        "persona_context": ""
+        "persona_context": "",
+        "transcript_buffer": [],
+        "transcript": "",
+        "coach_prompt": "",
+        "feedback_future": None,
+        "warmed_base_urls": set(),
+        "persona_future": None,
+        "inflight": set(),
+        "persona_error": "",
     }
     for key, value in defaults.items():
         if key not in st.session_state:
@@ -48,35 +224,250 @@ def reset_simulation() -> None:
     st.session_state.messages = []
     st.session_state.interview_active = False
     st.session_state.generated_persona = ""
+    st.session_state.persona_candidates = []
     st.session_state.analysis_done = False
     st.session_state.feedback_text = ""
     st.session_state.problem_statement = ""
     st.session_state.customer_segment = ""
     st.session_state.hypothesis_to_validate = ""
     st.session_state.persona_context = ""
+    st.session_state.transcript_buffer = []
+    st.session_state.transcript = ""
+    st.session_state.coach_prompt = ""
+    # Requests started in the background for the interview being reset are no longer wanted
+    abandon_stream_future(st.session_state.feedback_future)
+    if st.session_state.persona_future:
+        st.session_state.persona_future.cancel()
+    st.session_state.feedback_future = None
+    st.session_state.persona_future = None
+    st.session_state.inflight = set()
+    st.session_state.persona_error = ""
     st.rerun()
 
 
+def mark_inflight(task: str) -> None:
+    """
+    Button callback: flag an LLM task as running before the script reruns,
+    so the buttons that would start it again are already drawn disabled while it runs.
+    """
+    st.session_state.inflight.add(task)
+
+
 init_session_state()
 
 # ======================================================================================
 # LLM HELPERS
 # ======================================================================================
-def escape_dollars(stream):
+T = TypeVar("T")
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start one background event loop shared by every session.
+    All LLM IO is awaited here, so a stream created by one call can be iterated across many pulls.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return loop
+
+
+def submit_async(coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+    """Schedule a coroutine on the shared LLM event loop without waiting for it."""
+    return asyncio.run_coroutine_threadsafe(coro, get_llm_event_loop())
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on the shared LLM event loop and wait for its result."""
+    return submit_async(coro).result()
+
+
+def iter_async(async_iterator: AsyncIterator[str]) -> Iterator[str]:
+    """
+    Bridge an async iterator to a sync generator so st.write_stream can consume it.
+    A task on the LLM loop pumps items into a queue, so the stream is read ahead while Streamlit renders
+    and each item costs one queue handoff rather than a cross-thread coroutine round trip.
+    """
+    items: queue.SimpleQueue = queue.SimpleQueue()
+    done = object()
+
+    async def pump() -> None:
+        try:
+            async for item in async_iterator:
+                items.put(item)
+        finally:
+            items.put(done)
+
+    future = submit_async(pump())
+    try:
+        while (item := items.get()) is not done:
+            yield item
+        future.result()  # re-raise any error from the stream
+    finally:
+        # Stop reading if the consumer (e.g. an interrupted script run) went away early
+        future.cancel()
+
+
+async def escape_dollars(stream):
     """
     Streamlit Markdown treats $ specially (LaTeX).
     Escape dollar signs in streamed content to avoid accidental math rendering.
+
+    Deltas are coalesced before yielding, since every yield re-renders the message in st.write_stream.
+    Batches start small for a fast first paint and grow up to STREAM_BATCH_MAX_CHARS.
+    Once the stream ends, completion tokens per second are logged from the usage chunk, if one was sent.
+    """
+    buffer: list[str] = []
+    size = 0
+    batch_chars = STREAM_BATCH_START_CHARS
+    usage = None
+    started = time.monotonic()
+    async for event in stream:
+        # Some chunks carry no choices at all (e.g. the trailing usage chunk)
+        if not event.choices:
+            usage = getattr(event, "usage", None) or usage
+            continue
+        text = getattr(event.choices[0].delta, "content", None)
+        if not text:
+            continue
+        if "$" in text:
+            text = text.translate(_DOLLAR_TABLE)
+        buffer.append(text)
+        size += len(text)
+        if size >= batch_chars or text.endswith(_FLUSH_ENDINGS):
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+            batch_chars = min(batch_chars * 2, STREAM_BATCH_MAX_CHARS)
+    if buffer:
+        yield "".join(buffer)
+    if usage:
+        elapsed = time.monotonic() - started
+        logger.info(
+            "stream done: %d completion tokens in %.2fs (%.0f tok/s)",
+            usage.completion_tokens,
+            elapsed,
+            usage.completion_tokens / elapsed if elapsed else 0.0,
+        )
+
+
+async def warm_up_connection(http_client: httpx.AsyncClient, url: str) -> None:
+    """Issue a cheap HEAD through the endpoint's pool so the TCP + TLS handshake is done before the first real request."""
+    import httpx
+
+    try:
+        await http_client.head(url, timeout=5.0)
+    except httpx.HTTPError:
+        pass
+
+
+def close_http_client(http_client: httpx.AsyncClient) -> None:
+    """Release hook for get_http_client: close an evicted connection pool on the LLM loop."""
+    submit_async(http_client.aclose())
+
+
+@st.cache_resource(show_spinner=False, on_release=close_http_client)
+def get_http_client(base_url: str | None) -> httpx.AsyncClient:
+    """
+    One HTTP/2 keep-alive connection pool per endpoint, shared by the clients of every API key.
+    Credentials travel per request, so a new key (or a new session) starts on already-open connections.
+    """
+    import httpx
+    from openai import DefaultAsyncHttpxClient
+
+    return DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=64, max_keepalive_connections=32, keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        http2=True,
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=CLIENT_CACHE_MAX_ENTRIES)
+def get_client(api_key: str, base_url: str | None) -> AsyncOpenAI:
     """
-    for event in stream:
-        delta = event.choices[0].delta
-        text = getattr(delta, "content", None)
-        if text:
-            yield text.replace("$", r"\$")
+    Create an async OpenAI-compatible client (OpenAI or Gemini via OpenAI compatibility layer).
+    Cached per (api_key, base_url); the persona, interview and coach calls all share it, across sessions
+    that use the same key. Its connections come from the endpoint's shared pool, so an evicted client
+    has nothing of its own to close.
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        http_client=get_http_client(base_url),
+        timeout=httpx.Timeout(120.0, connect=5.0),
+    )
+    return client
 
 
-def build_client(api_key: str, base_url: str | None) -> OpenAI:
-    """Create an OpenAI-compatible client (OpenAI or Gemini via OpenAI compatibility layer)."""
-    return OpenAI(api_key=api_key, base_url=base_url)
+class CompletionCache:
+    """Thread-safe exact-match cache of finished completions, with a TTL and a size cap (oldest evicted first)."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, text = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), text)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+
+
+@st.cache_resource(show_spinner=False)
+def get_completion_cache() -> CompletionCache:
+    """One completion cache for the process; entries are keyed per API key (see completion_cache_key)."""
+    return CompletionCache(COMPLETION_CACHE_TTL_SECONDS, COMPLETION_CACHE_MAX_ENTRIES)
+
+
+def completion_cache_key(client: AsyncOpenAI, model_name: str, prompt: str) -> str:
+    """
+    Key a completion by API key, endpoint, model and the exact prompt text (a 128-bit BLAKE2b digest is plenty here).
+    The API key is part of the key, so a session never gets a result paid for with someone else's key.
+    """
+    return hashlib.blake2b(
+        f"{client.api_key}\0{client.base_url}\0{model_name}\0{prompt}".encode(), digest_size=16
+    ).hexdigest()
+
+
+def window_messages(messages: list[dict]) -> list[dict]:
+    """
+    Return the payload for an interview turn: the system prompt plus the most recent messages.
+    Older turns are dropped so request size and prefill time stay bounded in long interviews.
+
+    Turns are dropped in whole blocks rather than one by one, so the payload keeps the same prefix
+    for several turns in a row and the provider's prompt cache keeps hitting between slides.
+    """
+    history = messages[1:]
+    excess = len(history) - MAX_MESSAGES_VERBATIM
+    if excess <= 0 and sum(len(m["content"]) for m in history) <= WINDOW_MAX_CHARS:
+        return messages
+
+    drop = -(-max(excess, 0) // WINDOW_DROP_STEP) * WINDOW_DROP_STEP  # round up to a whole block
+    kept_chars = sum(len(m["content"]) for m in history[drop:])
+    while kept_chars > WINDOW_MAX_CHARS and len(history) - drop > WINDOW_DROP_STEP:
+        kept_chars -= sum(len(m["content"]) for m in history[drop : drop + WINDOW_DROP_STEP])
+        drop += WINDOW_DROP_STEP
+    if drop == 0:
+        return messages
+    return [messages[0], _OMITTED_TURNS_MESSAGE, *history[drop:]]
 
 
 def get_provider_config(provider: str):
@@ -85,31 +476,74 @@ def get_provider_config(provider: str):
     Business logic preserved exactly: OpenAI uses default base URL; Gemini uses OpenAI-compatible base URL; Gemini Test uses st.secrets.
     """
     api_key: str = ""
-    base_url: str | None = None
-    model_name: str = ""
+    settings = PROVIDER_SETTINGS[provider]
 
+    # Only the key entry is UI; base_url and model_name come from PROVIDER_SETTINGS
     if provider == "OpenAI":
         api_key = st.text_input("OpenAI API Key", type="password")
         st.link_button("Get an OpenAI API key", "https://platform.openai.com/docs/quickstart", icon=":material/open_in_new:", type="tertiary")
-        base_url = None
-        model_name = DEFAULT_OPENAI_MODEL
 
     elif provider == "Gemini":
         api_key = st.text_input("Gemini API Key", type="password")
         st.link_button("Get a Gemini API key", "https://ai.google.dev/gemini-api/docs/api-key", icon=":material/open_in_new:", type="tertiary")
-        base_url = GEMINI_OPENAI_COMPAT_BASE_URL
-        model_name = DEFAULT_GEMINI_MODEL
 
     else:  # Gemini (Test)
         st.success("Using a classroom demo key (rate-limited).")
         api_key = st.secrets.get("GEMINI_TEST_API_KEY", "")
-        base_url = GEMINI_OPENAI_COMPAT_BASE_URL
-        model_name = DEFAULT_GEMINI_MODEL
 
-    return api_key, base_url, model_name
+    return api_key, settings["base_url"], settings["model_name"]
+
+
+# Compact Method-Actor rules: terse, no Markdown emphasis, no indentation.
+# They are resent on every interview turn and are identical for every interview, so they come first and
+# form a byte-identical prefix the provider's prompt cache can reuse; the per-interview part follows.
+_STATIC_METHOD_ACTOR_RULES = """
+ROLE: You are not an AI assistant. You are a human being in a user interview, a method actor fully inhabiting the persona given at the end. You have no idea this is a simulation; you believe you are on a Zoom call or in a coffee shop.
+
+CONTEXT: You agreed to a 10-15 minute chat with a student/entrepreneur. You are busy and polite, but NOT trying to help them build their business. You only care about your own life and problems.
+
+RULES:
+1. Brevity: real people don't give speeches. Keep most answers to 1-2 sentences; elaborate only for a really good "how" or "why" question.
+2. Speech: natural and casual. Lowercase, loose punctuation and fillers ("um", "well", "honestly") are fine. Use "..." when thinking or recalling a memory.
+3. Future, hypothetical or leading questions ("Would you use this?", "How much would you pay?"): vague, polite, non-committal ("Yeah, maybe. It depends on the price."). Never validate their idea; lie to be nice if you have to.
+4. Past or open-ended questions ("When was the last time...?", "How did you solve...?"): specific, honest and grounded in your persona's reality. Only here do you give gold insights: details, emotions, frustrations, a mini-story, up to 3-4 sentences.
+5. If they pitch an idea/solution/product ("We are building an app that does X...", "We are a startup trying to solve Y..."), silently compare it to your persona's specific struggles:
+A. It fixes your biggest headache: show real interest/relief. Ask "Wait, does it actually do that? How much is it?"
+B. It fixes a problem you don't really care about: polite indifference ("Oh, cool. Yeah, I bet lots of people would like that."), no intent to buy.
+C. Otherwise: polite but visibly disinterested or skeptical. Never enthusiastic; you haven't seen it work yet.
+6. Emotion: frustrated or annoyed about problems your persona actually has; dismissive or confused about ones you don't care about.
+7. Style: don't sound like ChatGPT, no bullet points or lists, don't offer solutions. If a question is confusing, say "Wait, what do you mean?"
+""".strip()
+
+# Per-interview suffix of the system prompt, appended after _STATIC_METHOD_ACTOR_RULES
+_DYNAMIC_CONTEXT_TMPL = """
+YOUR PERSONA: {persona_context}
+
+HIDDEN FROM YOU (never reveal you know this): they are trying to validate the hypothesis "{hypothesis_to_validate}" in the problem space "{problem_statement}".
+
+{start_instruction}
+""".strip()
+
+# Closing line of the dynamic context: whether the student or the persona's seeded greeting opens the call
+_START_USER_FIRST = "Start the conversation now. The user will speak first."
+_START_AFTER_GREETING = "You have already greeted the student (your first message below); wait for their first question."
+
+
+def _dynamic_context(
+    persona_context: str, problem_statement: str, hypothesis_to_validate: str, greeted: bool
+) -> str:
+    """Fill in the per-interview part of the system prompt."""
+    return _DYNAMIC_CONTEXT_TMPL.format(
+        persona_context=persona_context,
+        problem_statement=problem_statement,
+        hypothesis_to_validate=hypothesis_to_validate,
+        start_instruction=_START_AFTER_GREETING if greeted else _START_USER_FIRST,
+    )
 
 
-def build_system_prompt(problem_statement: str, hypothesis_to_validate: str, persona_context: str) -> str:
+def build_system_prompt(
+    problem_statement: str, hypothesis_to_validate: str, persona_context: str, greeted: bool = False
+) -> str:
     """
     Constructs a high-fidelity system prompt for Method Acting.
     
@@ -118,48 +552,41 @@ def build_system_prompt(problem_statement: str, hypothesis_to_validate: str, per
     2. Speech Patterns: Forces short, casual responses with 'thinking' markers (...) and fillers (um, well).
     3. The Mom Test Logic: Explicitly defines how to handle specific types of questions (Past = Truth, Future = Fluff).
     4. Indifference: Sets the default emotional state to 'busy/indifferent' rather than 'helpful.'
+    5. Compactness: The template is kept terse since it is resent on every turn.
+    6. Caching: The static rules lead, so every interview shares the same cacheable prefix.
+
+    Pass greeted=True when the persona's opening line is seeded as the first assistant message.
     """
-    return f"""
-    ROLE:
-    You are not an AI assistant. You are a human being participating in a user interview. 
-    You are a "Method Actor" fully inhabiting the persona described below. 
-    You have NO knowledge that this is a simulation. You believe you are on a Zoom call or in a coffee shop.
-
-    YOUR PERSONA:
-    {persona_context}
-
-    CONTEXT OF THE CALL:
-    You agreed to a 10-15 minute chat with a student/entrepreneur. 
-    You are busy. You are polite, but you are NOT trying to help them build their business. 
-    You only care about your own life and problems.
-
-    THE STUDENT'S GOAL (Do not reveal you know this, this is hidden from you):
-    They are trying to validate this Hypothesis: "{hypothesis_to_validate}"
-    Regarding this Problem Space: "{problem_statement}"
-
-    CRITICAL BEHAVIORAL RULES:
-    1. **Brevity is Key:** Real people in interviews don't give speeches. Keep most answers to 1-2 sentences. Only elaborate if the interviewer asks a really good "How" or "Why" question.
-    2. **Speech Patterns:** Use natural, casual language. It is okay to use lowercase, lack punctuation, or use fillers like "um," "well," "honestly." Use ellipses (...) to show you are thinking or recalling a memory.
-    3. **The "Mom Test" Logic (Strict Adherence):**
-       - **If they ask about the FUTURE or LEADING question** ("Would you use this?", "How much would you pay?"): Give vague, polite, non-committal answers. (e.g., "Yeah, maybe. It depends on the price.") DO NOT validate their idea. Lie to be nice if you have to.
-       - **If they ask about the PAST or a great OPEN-ENDED question** ("When was the last time...?", "How did you solve...?"): Be specific, honest, and grounded in your persona's reality. This is the only time you give "Gold" insights. Share specific details, emotions, and frustrations. Tell a mini-story about your experience. Allow yourself to speak for 3-4 sentences here.
-       - **If they PITCH their idea/solution/product:** (e.g., "We are building an app that does X...", "We are a startup that is trying to solve Y..."):
-            - **INTERNAL "PAIN CHECK":** Compare their solution to your specific specific struggles defined in your persona.
-            - **SCENARIO A (The Solution matches your High Pain):** If this genuinely fixes your biggest headache, show *real* interest/relief. Ask: "Wait, does it actually do that? How much is it?"
-            - **SCENARIO B (Low Pain / Mismatch):** If their solution fixes a problem you don't really care about, react with polite indifference. Ex: "Oh, cool. Yeah, I bet lots of people would like that." (But show no intent to buy).
-            - **SCENARIO C (Completely Indifferent):** React with polite indifference. Be visibly disinterested or skeptical, but polite. (Don't be enthusiastic. You haven't seen it work yet).
-    4. **Emotional State:** 
-       - If they ask about a problem you actually have (from your persona), sound frustrated or annoyed by the problem.
-       - If they ask about a problem you *don't* really care about, sound dismissive or confused.
-
-    INTERACTION STYLE:
-    - Do not sound like ChatGPT.
-    - Do not use bullet points or structured lists.
-    - Do not offer solutions.
-    - If the question is confusing, say "Wait, what do you mean?"
-
-    Start the conversation now. The user will speak first.
-    """.strip()
+    return _STATIC_METHOD_ACTOR_RULES + "\n\n" + _dynamic_context(
+        persona_context, problem_statement, hypothesis_to_validate, greeted
+    )
+
+
+# Persona generation template, filled in by build_persona_prompt
+_PERSONA_PROMPT_TMPL = """
+ACT AS: A World-Class User Researcher and Simulation Architect.
+
+CONTEXT:
+We are simulating a "Customer Discovery" interview (based on principles from 'The Mom Test'). 
+The goal is to create a realistic persona that a student can interview to validate a business hypothesis.
+The persona must be grounded in reality, not a caricature of a "perfect customer."
+
+INPUTS:
+- Target Customer Segment: "{customer_segment}"
+- The Potential Pain Point: "{problem_statement}"
+
+TASK:
+Generate a very concise but specific user persona (1 sentence) that fits this segment. Output the persona immediately without any preamble.
+
+PERSONA RULES:
+1. **Only have Demographics & Role:** Specific Name, Age, Job/Major, and Location. 
+2. **No Spoilers:** DO NOT mention their specific frustrations, specific habits regarding the problem, or their opinions.
+
+OUTPUT EXAMPLES
+(e.g., “Maya Patel, 20, is a sophomore at NYU studying Computer Science and living with two roommates in Manhattan.”, 
+    “Brooke Smith, 32, is a freelance graphic designer in London working with small business clients.”,
+    “Marcus Johnson, 33, is a dual-income parent in Jersey City working in consulting and raising a toddler.”).
+""".strip()
 
 
 def build_persona_prompt(customer_segment: str, problem_statement: str) -> str:
@@ -171,103 +598,236 @@ def build_persona_prompt(customer_segment: str, problem_statement: str) -> str:
     2. Context: Explains this is for 'The Mom Test' (validating problems, not pitching ideas).
     3. Specificity: Asks for current behaviors (status quo) rather than "hidden truths".
     """
-    return f"""
-    ACT AS: A World-Class User Researcher and Simulation Architect.
-    
-    CONTEXT:
-    We are simulating a "Customer Discovery" interview (based on principles from 'The Mom Test'). 
-    The goal is to create a realistic persona that a student can interview to validate a business hypothesis.
-    The persona must be grounded in reality, not a caricature of a "perfect customer."
+    return _PERSONA_PROMPT_TMPL.format(
+        customer_segment=customer_segment,
+        problem_statement=problem_statement,
+    )
 
-    INPUTS:
-    - Target Customer Segment: "{customer_segment}"
-    - The Potential Pain Point: "{problem_statement}"
 
-    TASK:
-    Generate a very concise but specific user persona (1 sentence) that fits this segment. Output the persona immediately without any preamble.
-    
-    PERSONA RULES:
-    1. **Only have Demographics & Role:** Specific Name, Age, Job/Major, and Location. 
-    2. **No Spoilers:** DO NOT mention their specific frustrations, specific habits regarding the problem, or their opinions.
+# Appended to the persona prompt by build_persona_candidates_prompt
+_PERSONA_CANDIDATES_SUFFIX = """
+ADDITIONAL TASK:
+Instead of a single persona, generate {count} distinct personas that all fit the segment (vary name, age, role and location).
+
+OUTPUT FORMAT (exactly this, nothing else):
+One persona sentence per line, {count} lines, no numbering, no blank lines.
+""".strip()
 
-    OUTPUT EXAMPLES
-    (e.g., “Maya Patel, 20, is a sophomore at NYU studying Computer Science and living with two roommates in Manhattan.”, 
-        “Brooke Smith, 32, is a freelance graphic designer in London working with small business clients.”,
-        “Marcus Johnson, 33, is a dual-income parent in Jersey City working in consulting and raising a toddler.”).
+
+def build_persona_candidates_prompt(customer_segment: str, problem_statement: str) -> str:
+    """
+    Extends the persona prompt to return several candidates, one per line, from a single call.
     """
+    return (
+        build_persona_prompt(customer_segment, problem_statement)
+        + "\n\n"
+        + _PERSONA_CANDIDATES_SUFFIX.format(count=PERSONA_CANDIDATES)
+    )
+
+
+def split_persona_candidates(text: str) -> list[str]:
+    """
+    Parse the one-per-line candidates reply, dropping blank lines and stray list markers.
+    """
+    candidates = [_CANDIDATE_PREFIX_RE.sub("", line).strip() for line in text.splitlines()]
+    return [candidate for candidate in candidates if candidate][:PERSONA_CANDIDATES]
+
+
+# Appended to the persona prompt by build_persona_and_opener_prompt
+_PERSONA_OPENER_SUFFIX = """
+ADDITIONAL TASK:
+Then, fully in character as that persona, write the single casual sentence they say when the call starts.
+It is a greeting only: do not mention the problem, do not ask about the student's idea.
+
+OUTPUT FORMAT (exactly this, nothing else):
+<PERSONA>the persona sentence</PERSONA>
+<OPENER>the greeting</OPENER>
+""".strip()
+
+
+def build_persona_and_opener_prompt(customer_segment: str, problem_statement: str) -> str:
+    """
+    Extends the persona prompt so a single call also returns the persona's first line on the call.
+    Output is tagged so it can be split with _PERSONA_OPENER_RE.
+    """
+    return build_persona_prompt(customer_segment, problem_statement) + "\n\n" + _PERSONA_OPENER_SUFFIX
+
+
+async def generate_persona_and_opener(
+    client: AsyncOpenAI, model_name: str, customer_segment: str, problem_statement: str
+) -> tuple[str, str | None]:
+    """
+    Generate a persona and its opening line in one round trip.
+    If the tagged output can't be parsed, fall back to a persona-only call and no opener.
+    Raises ValueError if no persona comes back at all.
+    """
+    response = await client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "user", "content": build_persona_and_opener_prompt(customer_segment, problem_statement)}],
+        reasoning_effort=PERSONA_REASONING_EFFORT[model_name],
+        max_completion_tokens=PERSONA_MAX_COMPLETION_TOKENS,
+    )
+    match = _PERSONA_OPENER_RE.search(response.choices[0].message.content or "")
+    if match:
+        persona, opener = (part.strip().translate(_DOLLAR_TABLE) for part in match.groups())
+        if persona:
+            return persona, opener
+
+    response = await client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "user", "content": build_persona_prompt(customer_segment, problem_statement)}],
+        reasoning_effort=PERSONA_REASONING_EFFORT[model_name],
+        max_completion_tokens=PERSONA_MAX_COMPLETION_TOKENS,
+    )
+    persona = (response.choices[0].message.content or "").strip().translate(_DOLLAR_TABLE)
+    if not persona:
+        # e.g. the reply was cut off by the token cap before any text
+        raise ValueError("No persona came back from the model; please try again.")
+    return persona, None
+
+
+# Coach grading template, filled in by build_coach_prompt
+_COACH_PROMPT_TMPL = """
+ROLE:
+You are a strict but helpful Entrepreneurship Professor at a top MBA program. 
+You are grading a student's "Customer Discovery" assignment based on "The Mom Test" methodology.
+You must determine if the data they collected is valid or if it is "tainted" by bad questioning.
+
+TONE AND STYLE:
+- **Direct Address:** Speak directly to the student. Use "You asked...", "I noticed...", "You missed...".
+- **No Fluff:** Do not write like a blog post or an article. Do not use phrases like "The user asked..." -> say "You asked...".
+- **Authoritative:** You are the expert. Be firm about their mistakes.
+- **Mentorship:** Your goal is to help them fix their behavior for the next real interview.
+- **Brevity:** Don't be too verbose in the Output. Be concise and to the point but don't miss out any feedback. Do not compromise quality for brevity.
+
+INPUTS:
+- Student's Intended Hypothesis: "{original_hypothesis}"
+- Problem Space: "{problem_statement}"
+- Target Persona Profile: "{persona_context}"
+- Interview Transcript:
+{transcript}
+
+---
+
+YOUR TASK:
+Provide your grading feedback in Markdown. Don't be too verbose in each section, be brief and to the point, but do not miss anything. Start directly with the first section header.
+
+#### Question Critique
+Look closely at the specific questions you asked.
+- **Leading Questions:** Point out exactly where you tried to "lead the witness." Quote your bad question and tell them why it failed.
+- **The Fix:** Show me how you *should* have asked it. 
+  *Example:* "You asked 'Is X hard?', which is a leading question. You should have asked: 'Tell me about the last time you dealt with X.'"
+- **Pitching:** Did you try to sell your idea? If so, tell them strictly: "You stopped doing research and started pitching. This invalidates your data."
+
+#### Hypothesis Verdict
+Based strictly on what the Persona said to you:
+- **My Verdict:** (VALIDATED / INVALIDATED / INCONCLUSIVE)
+- **The "False Positive" Check:** Did you just get a polite "Yes"? Warn them if they fell into this trap. "The customer said yes, but only because you asked a hypothetical question."
+
+#### Missed Opportunities
+I noticed you failed to ask about these critical areas:
+- Did you ask about their **Current Workarounds**? (How they solve it *now*).
+- Did you ask about **Money/Budget**?
+- Did you ask about **Frequency**?
+*Tell them specifically what the "Missing Link" was in this interview.*
+
+#### Your Grade
+**Score: _/10**
+
+Based on the technique analysis above, assign a score out of 10 (use 0.25 increments, e.g., 7.25). Use the following rubric:
+- **9–10 (Distinction):** Flawless. Almost entirely behavioral/past-tense questions. Deep, specific insights uncovered. Minimal/no pitching. (Rare)
+- **7–8 (Good):** Mostly open-ended and grounded in past behavior. Maybe 1–2 minor leading/hypothetical questions, but you recover quickly and still get real evidence.
+- **5–6 (Average):** Mixed quality. Several leading or hypothetical “Would you use this?” questions OR a noticeable drift into pitching. Some useful data, but validity is shaky.
+- **3–4 (Poor):** Interview is dominated by leading questions and hypotheticals. Clear “pitching mode” for meaningful stretches. Customer responses are mostly vague/polite, not evidence.
+- **0–2 (Unacceptable):** Essentially a sales call. Heavy pitching, biased framing, ignores/overrides negativity, or fails to elicit any past behavior. Data is unusable. Went completely off topic.
+
+*Provide a 1–2 sentence justification for why you gave this score.*
+
+#### Final Advice
+Write a concluding advice (2-3 sentences or bullet points) for their next interview:
+- Explain the psychological mistake they made (e.g., "You were seeking approval, not truth").
+- Give them a specific tactic or question to use next time.
+- End with an encouraging but firm closing statement. Ex: "To get to the next level, you need to stop seeking approval and start seeking truth.", "You fell into the trap of pitching. Next time, focus entirely on their past behavior."
+""".strip()
 
 
 def build_coach_prompt(transcript: str, original_hypothesis: str, problem_statement: str, persona_context: str) -> str:
     """
     Constructs a feedback prompt that prioritizes analysis first, followed by a strict score.
     """
-    return f"""
-    ROLE:
-    You are a strict but helpful Entrepreneurship Professor at a top MBA program. 
-    You are grading a student's "Customer Discovery" assignment based on "The Mom Test" methodology.
-    You must determine if the data they collected is valid or if it is "tainted" by bad questioning.
-
-    TONE AND STYLE:
-    - **Direct Address:** Speak directly to the student. Use "You asked...", "I noticed...", "You missed...".
-    - **No Fluff:** Do not write like a blog post or an article. Do not use phrases like "The user asked..." -> say "You asked...".
-    - **Authoritative:** You are the expert. Be firm about their mistakes.
-    - **Mentorship:** Your goal is to help them fix their behavior for the next real interview.
-    - **Brevity:** Don't be too verbose in the Output. Be concise and to the point but don't miss out any feedback. Do not compromise quality for brevity.
-
-    INPUTS:
-    - Student's Intended Hypothesis: "{original_hypothesis}"
-    - Problem Space: "{problem_statement}"
-    - Target Persona Profile: "{persona_context}"
-    - Interview Transcript:
-    {transcript}
-
-    ---
-
-    YOUR TASK:
-    Provide your grading feedback in Markdown. Don't be too verbose in each section, be brief and to the point, but do not miss anything. Start directly with the first section header.
-
-    #### Question Critique
-    Look closely at the specific questions you asked.
-    - **Leading Questions:** Point out exactly where you tried to "lead the witness." Quote your bad question and tell them why it failed.
-    - **The Fix:** Show me how you *should* have asked it. 
-      *Example:* "You asked 'Is X hard?', which is a leading question. You should have asked: 'Tell me about the last time you dealt with X.'"
-    - **Pitching:** Did you try to sell your idea? If so, tell them strictly: "You stopped doing research and started pitching. This invalidates your data."
-
-    #### Hypothesis Verdict
-    Based strictly on what the Persona said to you:
-    - **My Verdict:** (VALIDATED / INVALIDATED / INCONCLUSIVE)
-    - **The "False Positive" Check:** Did you just get a polite "Yes"? Warn them if they fell into this trap. "The customer said yes, but only because you asked a hypothetical question."
-
-    #### Missed Opportunities
-    I noticed you failed to ask about these critical areas:
-    - Did you ask about their **Current Workarounds**? (How they solve it *now*).
-    - Did you ask about **Money/Budget**?
-    - Did you ask about **Frequency**?
-    *Tell them specifically what the "Missing Link" was in this interview.*
-
-    #### Your Grade
-    **Score: _/10**
-    
-    Based on the technique analysis above, assign a score out of 10 (use 0.25 increments, e.g., 7.25). Use the following rubric:
-    - **9–10 (Distinction):** Flawless. Almost entirely behavioral/past-tense questions. Deep, specific insights uncovered. Minimal/no pitching. (Rare)
-    - **7–8 (Good):** Mostly open-ended and grounded in past behavior. Maybe 1–2 minor leading/hypothetical questions, but you recover quickly and still get real evidence.
-    - **5–6 (Average):** Mixed quality. Several leading or hypothetical “Would you use this?” questions OR a noticeable drift into pitching. Some useful data, but validity is shaky.
-    - **3–4 (Poor):** Interview is dominated by leading questions and hypotheticals. Clear “pitching mode” for meaningful stretches. Customer responses are mostly vague/polite, not evidence.
-    - **0–2 (Unacceptable):** Essentially a sales call. Heavy pitching, biased framing, ignores/overrides negativity, or fails to elicit any past behavior. Data is unusable. Went completely off topic.
+    return _COACH_PROMPT_TMPL.format(
+        transcript=transcript,
+        original_hypothesis=original_hypothesis,
+        problem_statement=problem_statement,
+        persona_context=persona_context,
+    )
+
 
-    *Provide a 1–2 sentence justification for why you gave this score.*
+def open_coach_stream(client: AsyncOpenAI, model_name: str, coach_prompt: str) -> concurrent.futures.Future:
+    """Start the streaming coach feedback request on the LLM loop and return a future for the stream."""
+    return submit_async(
+        client.chat.completions.create(
+            model=model_name,
+            messages=[{"role": "user", "content": coach_prompt}],
+            reasoning_effort="low",
+            max_completion_tokens=COACH_MAX_COMPLETION_TOKENS,
+            stream=True,
+            stream_options=_STREAM_OPTIONS,
+        )
+    )
 
-    #### Final Advice
-    Write a concluding advice (2-3 sentences or bullet points) for their next interview:
-    - Explain the psychological mistake they made (e.g., "You were seeking approval, not truth").
-    - Give them a specific tactic or question to use next time.
-    - End with an encouraging but firm closing statement. Ex: "To get to the next level, you need to stop seeking approval and start seeking truth.", "You fell into the trap of pitching. Next time, focus entirely on their past behavior."
+
+def abandon_stream_future(future: concurrent.futures.Future | None) -> None:
+    """
+    Drop a streaming request nobody will consume, e.g. on a reset right after End & Analyze.
+    Cancels it while it is still opening, or closes the open stream so its connection goes back to the pool.
     """
+    if future is None or future.cancel():
+        return
+    if future.exception() is None:
+        submit_async(future.result().close())
 
 
-def transcript_from_messages(messages: list[dict]) -> str:
-    """Create a plain-text transcript for analysis (excluding system messages)."""
-    return "\n".join([f"{m['role'].upper()}: {m['content']}" for m in messages if m["role"] != "system"])
+@st.cache_resource(show_spinner=False)
+def load_svg_data_uri(path: str) -> str:
+    """
+    Read an SVG logo once per process and return it as a data URI.
+    st.image passes data URIs straight through, instead of re-reading and re-encoding the file every rerun.
+    """
+    with open(path, "rb") as svg_file:
+        return "data:image/svg+xml;base64," + base64.b64encode(svg_file.read()).decode("ascii")
+
+
+def append_message(role: str, content: str) -> None:
+    """
+    Record one interview turn in both the API message list and the transcript buffer.
+    Keeping the two in lockstep means the transcript never has to be rebuilt from messages.
+    """
+    st.session_state.messages.append({"role": role, "content": content})
+    st.session_state.transcript_buffer.append(f"{role.upper()}: {content}")
+
+
+def begin_interview(generated_persona: str, opener: str | None = None) -> None:
+    """
+    Seed the conversation: build the system prompt for the chosen persona and add the opener, if any.
+    Without a generated persona the customer segment is used as the persona context.
+    """
+    st.session_state.persona_context = (
+        generated_persona
+        if generated_persona
+        else f"A member of this segment: {st.session_state.saved_customer_segment}"
+    )
+
+    system_prompt = build_system_prompt(
+        problem_statement=st.session_state.saved_problem_statement,
+        hypothesis_to_validate=st.session_state.saved_hypothesis_to_validate,
+        persona_context=st.session_state.persona_context,
+        greeted=bool(opener),
+    )
+
+    st.session_state.messages = [{"role": "system", "content": system_prompt}]
+    if opener:
+        append_message("assistant", opener)
 
 
 # ======================================================================================
@@ -279,6 +839,30 @@ with st.sidebar:
     selected_provider = st.selectbox("Choose an AI provider", PROVIDERS)
     api_key, base_url, model_name = get_provider_config(selected_provider)
 
+    client = get_client(api_key, base_url) if api_key else None
+
+    # Warm the pool once per session and endpoint as soon as a key is known, without blocking the page;
+    # the shared pool may have gone idle past its keep-alive since another session last used it
+    if client and str(client.base_url) not in st.session_state.warmed_base_urls:
+        st.session_state.warmed_base_urls.add(str(client.base_url))
+        submit_async(warm_up_connection(get_http_client(base_url), str(client.base_url)))
+
+    economy_mode = st.toggle(
+        "Economy mode",
+        value=True,
+        help="Personas and customer replies use a smaller, cheaper model. The coach feedback always uses the full model.",
+    )
+    chat_model_name = PROVIDER_SETTINGS[selected_provider]["economy_model_name"] if economy_mode else model_name
+
+    interview_max_completion_tokens = st.slider(
+        "Max tokens per customer reply",
+        min_value=60,
+        max_value=600,
+        value=INTERVIEW_MAX_COMPLETION_TOKENS,
+        step=20,
+        help="Lower keeps the customer terse and replies fast; raise it if answers get cut off.",
+    )
+
     st.text("")
     st.info(HELP_TEXT)
 
@@ -293,255 +877,342 @@ with st.sidebar:
 # st.logo("Wharton_logo.svg")
 
 # CUSTOM CSS TO REMOVE IMAGE BORDER RADIUS
-st.markdown(
-    """
-    <style>
-        /* 1. Force the main container to go to the top */
-        .block-container {
-            padding-top: 2rem !important; /* Default is usually 6rem+ */
-            padding-bottom: 2rem !important;
-        }
-
-        /* 2. Remove the rounded corners from logos */
-        [data-testid="stImage"] img {
-            border-radius: 0px !important;
-        }
-
-        /* 3. (Optional) Hide the top header decoration line if you want a clean look */
-        header[data-testid="stHeader"] {
-            background-color: transparent;
-        }
-        
-        /* 2. Sidebar Content: Force to top */
-        [data-testid="stSidebarContent"] {
-            padding-top: 0rem !important;
-        }
-
-        /* 3. SIDEBAR HEADER FIX: Remove the default top margin from the "Setup" header */
-        [data-testid="stSidebarContent"] h2 {
-            margin-top: -32px !important;
-            padding-top: 0px !important;
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Re-emitted on every full run: Streamlit drops elements a run does not emit, so "inject once" would lose the styles
+st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
 
 # SETUP LOGOS
 col1, col2, col3 = st.columns([1, 1, 10])
 
 with col1:
-    st.image("Wharton_logo.svg")
+    st.image(load_svg_data_uri("Wharton_logo.svg"))
 
 with col2:
-    st.image("Photon_logo_full.svg")
+    st.image(load_svg_data_uri("Photon_logo_full.svg"))
 
 
 # SETUP LAB TEXT & CREDITS
-st.markdown(
-    """
-    <div style="margin-top: 0px;">
-        <h6 style="margin-bottom: 0px; padding-bottom: 0px;">Wharton-Photon Startup AI Lab</h6>
-        <p style="font-size: 0.85rem; color: gray; margin-top: 2px;">
-            Created by: Arnab Manna, Hari Ravi, J. Daniel Kim (2026)
-        </p>
-    </div>
-    """,
-    unsafe_allow_html=True
-)
+st.markdown(_CREDITS_HTML, unsafe_allow_html=True)
 st.text("")
 
 # ======================================================================================
 # SECTION 1: INPUTS (only shown before interview starts)
 # ======================================================================================
-if not st.session_state.interview_active:
+def inputs_section(api_key: str, client: AsyncOpenAI | None, model_name: str) -> None:
+    """
+    Problem inputs, persona builder and Start Interview.
+    Not a fragment: typing inside the form never reruns, and every Generate or Start click ends in a full rerun.
+    """
     # TITLE & SUBTITLE
     st.subheader("🕵️ AI-assisted Customer Discovery App")
     st.markdown("Refine your customer discovery process before talking to real customers")
 
-    col_left, col_right = st.columns(2)
+    # Inputs, persona builder and start live in one form: typing does not rerun the app, and both buttons
+    # submit the current field values together with the click in a single rerun
+    with st.form("inputs_form", border=False):
+        col_left, col_right = st.columns(2)
 
-    with col_left:
-        customer_segment = st.text_area(
-            "Chosen Customer Segment",
-            placeholder="e.g., Dual-working parents living in an middle-upper class, dense city in the East Coast with young children.",
-            height=100,
-        )
+        with col_left:
+            customer_segment = st.text_area(
+                "Chosen Customer Segment",
+                placeholder="e.g., Dual-working parents living in an middle-upper class, dense city in the East Coast with young children.",
+                height=100,
+            )
 
-        proposed_solution = st.text_area(
-            "Proposed Solution",
-            placeholder="e.g., Online peer-to-peer marketplace where parents can rent (out) used toys.",
-            height=100,
-        )
+            proposed_solution = st.text_area(
+                "Proposed Solution",
+                placeholder="e.g., Online peer-to-peer marketplace where parents can rent (out) used toys.",
+                height=100,
+            )
 
-    with col_right:
-        problem_statement = st.text_area(
-            "Problem Statement",
-            placeholder="e.g., Young parents struggle to buy new toys because of the space that they take up.",
-            height=100,
-        )
+        with col_right:
+            problem_statement = st.text_area(
+                "Problem Statement",
+                placeholder="e.g., Young parents struggle to buy new toys because of the space that they take up.",
+                height=100,
+            )
     
-        hypothesis_to_validate = st.text_area(
-            "Hypothesis to test",
-            placeholder="Enter your hypothesis",
-            height=100,
-        )
+            hypothesis_to_validate = st.text_area(
+                "Hypothesis to test",
+                placeholder="Enter your hypothesis",
+                height=100,
+            )
 
-    # ----------------------------------------------------------------------------------
-    # OPTIONAL: PERSONA BUILDER
-    # ----------------------------------------------------------------------------------
-    st.text("")
-    st.write("##### 👤 Persona Builder")
-    st.markdown("Generate a persona first to begin the interview.")
-
-    if st.button("✨ Generate Persona"):
-        if not api_key:
-            st.error("Please enter your LLM API Key in the sidebar first.")
-        elif not problem_statement or not customer_segment:
-            st.error("Please fill in Problem Statement and Customer Segment first.")
-        else:
-            try:
-                client = build_client(api_key=api_key, base_url=base_url)
-                with st.spinner("Dreaming up a customer..."):
-                    persona_prompt = build_persona_prompt(customer_segment, problem_statement)
-                    response = client.chat.completions.create(
-                        model=model_name,
-                        messages=[{"role": "user", "content": persona_prompt}],
-                        reasoning_effort="low",
-                    )
-                st.session_state.generated_persona = response.choices[0].message.content.replace("$", r"\$")
-            except Exception as exc:
-                st.error(f"Error: {exc}")
-
-    use_generated_persona = False
-    if st.session_state.generated_persona:
-        st.success("**Generated Persona**\n\n" + st.session_state.generated_persona)
-        persona_choice = st.radio(
-            "Which persona context do you want to use for the Interview?",
-            ["Use Generated Persona", "Use Inputted Customer Segment"],
-            index=0,
-            horizontal=True,
+        # ----------------------------------------------------------------------------------
+        # OPTIONAL: PERSONA BUILDER
+        # ----------------------------------------------------------------------------------
+        st.text("")
+        st.write("##### 👤 Persona Builder")
+        st.markdown("Generate a persona first to begin the interview.")
+
+        # The click is read from the in-flight flag set by the callback: the button is drawn disabled
+        # for the run that does the work, and a disabled button reports no click
+        st.form_submit_button(
+            "✨ Generate Persona",
+            disabled="persona" in st.session_state.inflight,
+            on_click=mark_inflight,
+            args=("persona",),
         )
-        if persona_choice == "Use Generated Persona":
-            use_generated_persona = True
-
-    st.divider()
-
-    # ----------------------------------------------------------------------------------
-    # START INTERVIEW ACTION
-    # ----------------------------------------------------------------------------------
-    if st.button("🚀 Start Interview", type="primary"):
-        if not api_key:
-            st.error("Please enter your LLM API Key in the sidebar.")
-        elif not problem_statement or not customer_segment or not hypothesis_to_validate:
-            st.error("Please fill in all the input fields above.")
-        else:
-            st.session_state.saved_problem_statement = problem_statement
-            st.session_state.saved_customer_segment = customer_segment
-            st.session_state.saved_hypothesis_to_validate = hypothesis_to_validate
-            st.session_state.persona_context = (
-                st.session_state.generated_persona
-                if (st.session_state.generated_persona and use_generated_persona)
-                else f"A member of this segment: {st.session_state.customer_segment}"
+        # An error from the last Generate run, shown on the rerun that draws the buttons enabled again
+        if st.session_state.persona_error:
+            st.error(st.session_state.persona_error)
+            st.session_state.persona_error = ""
+
+        if "persona" in st.session_state.inflight:
+            st.session_state.inflight.discard("persona")
+            if not api_key:
+                st.session_state.persona_error = "Please enter your LLM API Key in the sidebar first."
+            elif not problem_statement or not customer_segment:
+                st.session_state.persona_error = "Please fill in Problem Statement and Customer Segment first."
+            else:
+                try:
+                    # Not cached: a repeat click is a request for a new set of personas
+                    persona_prompt = build_persona_candidates_prompt(customer_segment, problem_statement)
+                    with st.spinner("Dreaming up a customer..."):
+                        stream = run_async(
+                            client.chat.completions.create(
+                                model=model_name,
+                                messages=[{"role": "user", "content": persona_prompt}],
+                                reasoning_effort=PERSONA_REASONING_EFFORT[model_name],
+                                max_completion_tokens=PERSONA_CANDIDATES_MAX_COMPLETION_TOKENS,
+                                stream=True,
+                                stream_options=_STREAM_OPTIONS,
+                            )
+                        )
+                    # Stream into a placeholder; the persona picker below takes over once it is complete
+                    persona_placeholder = st.empty()
+                    with persona_placeholder:
+                        personas_text = st.write_stream(iter_async(escape_dollars(stream)))
+                    persona_placeholder.empty()
+                    candidates = split_persona_candidates(personas_text)
+                    if candidates:
+                        st.session_state.persona_candidates = candidates
+                    else:
+                        # e.g. the reasoning used up the token cap before any persona was written
+                        st.session_state.persona_error = "No persona came back from the model; please try again."
+                except Exception as exc:
+                    st.session_state.persona_error = f"Error: {exc}"
+            # This run drew the buttons disabled, and typing inside the form never reruns,
+            # so rerun on every exit path to redraw them enabled
+            st.rerun()
+
+        chosen_persona = ""
+        if st.session_state.persona_candidates:
+            segment_option = "Use Inputted Customer Segment"
+            persona_choice = st.radio(
+                "Which persona context do you want to use for the Interview?",
+                [*st.session_state.persona_candidates, segment_option],
+                index=0,
             )
+            if persona_choice != segment_option:
+                chosen_persona = persona_choice
 
-            system_prompt = build_system_prompt(
-                problem_statement=problem_statement,
-                hypothesis_to_validate=hypothesis_to_validate,
-                persona_context=st.session_state.persona_context,
+        st.divider()
+
+        auto_persona = False
+        if not st.session_state.persona_candidates:
+            auto_persona = st.checkbox(
+                "Skip the Persona Builder: generate a persona and its greeting when the interview starts",
+                help="Saves a round trip: the persona and the customer's first line come back from a single call.",
             )
 
-            st.session_state.messages = [{"role": "system", "content": system_prompt}]
-            st.session_state.interview_active = True
-            st.rerun()
+        # ----------------------------------------------------------------------------------
+        # START INTERVIEW ACTION
+        # ----------------------------------------------------------------------------------
+        if st.form_submit_button("🚀 Start Interview", type="primary", disabled="persona" in st.session_state.inflight):
+            if not api_key:
+                st.error("Please enter your LLM API Key in the sidebar.")
+            elif not problem_statement or not customer_segment or not hypothesis_to_validate:
+                st.error("Please fill in all the input fields above.")
+            else:
+                st.session_state.saved_problem_statement = problem_statement
+                st.session_state.saved_customer_segment = customer_segment
+                st.session_state.saved_hypothesis_to_validate = hypothesis_to_validate
+
+                if auto_persona:
+                    # Generate in the background; Section 2 finishes setup while the app reruns into the interview
+                    st.session_state.persona_future = submit_async(
+                        generate_persona_and_opener(client, model_name, customer_segment, problem_statement)
+                    )
+                else:
+                    begin_interview(chosen_persona)
+                st.session_state.interview_active = True
+                st.rerun()
+
+
+if not st.session_state.interview_active:
+    inputs_section(api_key, client, chat_model_name)
+
 
 # ======================================================================================
 # SECTION 2: INTERVIEW INTERFACE
 # ======================================================================================
-if st.session_state.interview_active and not st.session_state.analysis_done:
-    st.subheader("💬 Interview in Progress")
+def render_messages(messages: list[dict]) -> None:
+    """
+    Draw chat bubbles for the given interview turns.
+    """
+    for message in messages:
+        with st.chat_message(message["role"], avatar=AVATAR_MAP.get(message["role"], "💬")):
+            st.markdown(message["content"])
 
-    avatar_map = {"user": "🧑‍🎓", "assistant": "👤"}
 
-    # Display chat history (excluding system prompt)
-    for message in st.session_state.messages:
-        if message["role"] == "system":
-            continue
-        with st.chat_message(message["role"], avatar=avatar_map.get(message["role"], "💬")):
-            st.markdown(message["content"])
+@st.fragment
+def interview_chat(
+    client: AsyncOpenAI | None,
+    chat_model_name: str,
+    model_name: str,
+    provider_settings: dict,
+    max_completion_tokens: int,
+) -> None:
+    """
+    Chat history, chat input and the End button of the interview.
+    Runs as a fragment, so a chat turn reruns only this section instead of the whole page.
+    Replies come from chat_model_name; the coach stream opened on End uses model_name.
+    """
+    # Display chat history (excluding system prompt, which is only ever messages[0])
+    render_messages(st.session_state.messages[1:])
 
     # User input -> assistant response (streamed)
     user_question = st.chat_input("Start asking your question to the customer here...")
     if user_question:
-        st.chat_message("user", avatar=avatar_map["user"]).write(user_question)
-        st.session_state.messages.append({"role": "user", "content": user_question})
-
-        client = build_client(api_key=api_key, base_url=base_url)
-        with st.chat_message("assistant", avatar=avatar_map["assistant"]):
-            stream = client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": m["role"], "content": m["content"]} for m in st.session_state.messages],
-                reasoning_effort="low",
-                stream=True,
+        st.chat_message("user", avatar=AVATAR_MAP["user"]).write(user_question)
+        append_message("user", user_question)
+
+        with st.chat_message("assistant", avatar=AVATAR_MAP["assistant"]):
+            stream = run_async(
+                client.chat.completions.create(
+                    model=chat_model_name,
+                    # Stored messages already match the API schema, so no per-turn copy is needed
+                    messages=window_messages(st.session_state.messages),
+                    reasoning_effort=INTERVIEW_REASONING_EFFORT[chat_model_name],
+                    max_completion_tokens=max_completion_tokens,
+                    stream=True,
+                    stream_options=_STREAM_OPTIONS,
+                    **(
+                        {"prompt_cache_key": provider_settings["prompt_cache_key"]}
+                        if provider_settings["prompt_cache_key"]
+                        else {}
+                    ),
+                )
             )
-            assistant_reply = st.write_stream(escape_dollars(stream))
+            assistant_reply = st.write_stream(iter_async(escape_dollars(stream)))
+            if not assistant_reply:
+                # Reasoning can use up the whole cap; an empty turn would be resent with every later request
+                st.warning(
+                    "The customer's reply was cut off before any text. "
+                    "Raise *Max tokens per customer reply* in the sidebar and ask again."
+                )
 
-        st.session_state.messages.append({"role": "assistant", "content": assistant_reply})
+        if assistant_reply:
+            append_message("assistant", assistant_reply)
 
     st.markdown("---")
     if len(st.session_state.messages) > 2:  # Only show if conversation has started
         if st.button("🛑 End & Analyze Interview", type="tertiary"):
+            # The interview is frozen now, so the transcript and coach prompt are built exactly once
+            st.session_state.transcript = "\n".join(st.session_state.transcript_buffer)
+            st.session_state.coach_prompt = build_coach_prompt(
+                transcript=st.session_state.transcript,
+                original_hypothesis=st.session_state.saved_hypothesis_to_validate,
+                problem_statement=st.session_state.saved_problem_statement,
+                persona_context=st.session_state.persona_context,
+            )
+            # Reuse feedback for an identical interview; otherwise open the stream now so the request
+            # is in flight while the app reruns into Section 3
+            if client:
+                coach_key = completion_cache_key(client, model_name, st.session_state.coach_prompt)
+                st.session_state.feedback_text = get_completion_cache().get(coach_key) or ""
+                if not st.session_state.feedback_text:
+                    st.session_state.feedback_future = open_coach_stream(client, model_name, st.session_state.coach_prompt)
             st.session_state.analysis_done = True
             st.rerun()
 
+
+if st.session_state.interview_active and not st.session_state.analysis_done:
+    st.subheader("💬 Interview in Progress")
+
+    # Finish an auto-persona start: the persona request has been in flight since Start Interview was clicked
+    if st.session_state.persona_future:
+        persona_future = st.session_state.persona_future
+        st.session_state.persona_future = None
+        try:
+            with st.spinner("Your customer is joining the call..."):
+                st.session_state.generated_persona, opener = persona_future.result()
+        except Exception as exc:
+            # No persona-less interview: go back to setup, where Section 1 shows the error
+            st.session_state.persona_error = f"Error: {exc}"
+            st.session_state.interview_active = False
+            st.rerun()
+        begin_interview(st.session_state.generated_persona, opener)
+
+    interview_chat(
+        client,
+        chat_model_name,
+        model_name,
+        PROVIDER_SETTINGS[selected_provider],
+        interview_max_completion_tokens,
+    )
+
 # ======================================================================================
 # SECTION 3: ANALYSIS & FEEDBACK
 # ======================================================================================
-if st.session_state.analysis_done:
-    st.subheader("📝 AI Prof. Danny's feedback")
-
-    transcript = transcript_from_messages(st.session_state.messages)
-    coach_prompt = build_coach_prompt(
-        transcript=transcript, 
-        original_hypothesis=st.session_state.saved_hypothesis_to_validate, 
-        problem_statement=st.session_state.saved_problem_statement,
-        persona_context=st.session_state.persona_context
+def build_download_text(transcript: str, feedback_text: str) -> str:
+    """
+    Assemble the downloadable transcript + feedback file.
+    Streamlit calls this off the script thread when the button is clicked, so it takes its inputs
+    as arguments instead of reading session state.
+    """
+    return (
+        "INTERVIEW TRANSCRIPT\n"
+        "====================\n\n"
+        f"{transcript}\n\n"
+        "--------------------------------------------------\n"
+        "AI COACH FEEDBACK\n"
+        "--------------------------------------------------\n\n"
+        f"{feedback_text}"
     )
 
-    if api_key and not st.session_state.feedback_text:
+
+def feedback_section(api_key: str, client: AsyncOpenAI | None, model_name: str) -> None:
+    """
+    Coach feedback, download and restart.
+    Not a fragment: the download click does not rerun at all and restart reruns the whole app.
+    """
+    st.subheader("📝 AI Prof. Danny's feedback")
+
+    if st.session_state.feedback_text:
+        # Reruns after the analysis (e.g. a sidebar change) render the cached feedback without any API work
+        st.markdown(st.session_state.feedback_text)
+    elif api_key:
         with st.spinner("Analyzing your interview technique..."):
             try:
-                client = build_client(api_key=api_key, base_url=base_url)
-                stream = client.chat.completions.create(
-                    model=model_name,
-                    messages=[{"role": "user", "content": coach_prompt}],
-                    reasoning_effort="low",
-                    stream=True,
-                )
-                feedback_markdown = st.write_stream(escape_dollars(stream))
+                # Consume the stream opened by End & Analyze; open a new one if a rerun already used it up
+                future = st.session_state.feedback_future or open_coach_stream(client, model_name, st.session_state.coach_prompt)
+                st.session_state.feedback_future = None
+                stream = future.result()
+                feedback_markdown = st.write_stream(iter_async(escape_dollars(stream)))
                 st.session_state.feedback_text = feedback_markdown
+                get_completion_cache().put(
+                    completion_cache_key(client, model_name, st.session_state.coach_prompt), feedback_markdown
+                )
 
             except Exception as exc:
                 st.error(f"Error analyzing: {exc}")
 
     if st.session_state.feedback_text:
-        
-        full_download_content = (
-            "INTERVIEW TRANSCRIPT\n"
-            "====================\n\n"
-            f"{transcript}\n\n"
-            "--------------------------------------------------\n"
-            "AI COACH FEEDBACK\n"
-            "--------------------------------------------------\n\n"
-            f"{st.session_state.feedback_text}"
-        )
-
+        # The file is only assembled when the button is clicked, and the click does not rerun the app
         st.download_button(
             "Download Feedback & Transcript",
-            data=full_download_content,
+            data=functools.partial(
+                build_download_text, st.session_state.transcript, st.session_state.feedback_text
+            ),
             file_name="interview_and_feedback.txt",
             icon=":material/download:",
+            on_click="ignore",
         )
 
     if st.button("Start New Simulation", icon=":material/playlist_add:", type="primary"):
         reset_simulation()
+
+
+if st.session_state.analysis_done:
+    feedback_section(api_key, client, model_name)